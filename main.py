@@ -2,20 +2,22 @@ import sys
 import os
 import sqlite3
 import webbrowser
-from datetime import datetime
+from datetime import datetime, date
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QLabel, QPushButton, QScrollArea, 
                              QGridLayout, QLineEdit, QTextEdit, QDialog,
                              QFileDialog, QMessageBox, QSystemTrayIcon,
-                             QMenu, QComboBox, QDateTimeEdit, QListWidget, QStyleFactory,
+                             QMenu, QComboBox, QDateTimeEdit, QListWidget, QListWidgetItem, QStyleFactory,
                              QGraphicsDropShadowEffect, QFormLayout,
                              QCalendarWidget, QTabWidget, QProgressBar, QCompleter)
-from PyQt6.QtCore import Qt, QTimer, QPropertyAnimation, QEasingCurve, QDateTime, pyqtSignal
+from PyQt6.QtCore import Qt, QTimer, QPropertyAnimation, QEasingCurve, QDateTime, QTime, pyqtSignal
 from PyQt6.QtGui import QIcon, QColor, QPalette, QFont
 import winreg
 
 import sqlite3
 import os
+import smart_views
+import rollups
 
 class DatabaseManager:
     def __init__(self):
@@ -59,7 +61,16 @@ class DatabaseManager:
             for column in columns_to_check:
                 if not self.column_exists("tasks", column):
                     cursor.execute(f'ALTER TABLE tasks ADD COLUMN {column} TEXT')
-            
+
+            rollups.create_rollup_tables(cursor)
+
+            tags_indexed = self.table_exists("task_tags")
+            smart_views.create_smart_view_tables(cursor)
+            if not tags_indexed:
+                cursor.execute('SELECT id, tags FROM tasks')
+                for task_id, tags in cursor.fetchall():
+                    smart_views.set_task_tags(cursor, task_id, (tags or "").split(','))
+
             self.conn.commit()
                 
         except sqlite3.Error as e:
@@ -72,22 +83,44 @@ class DatabaseManager:
         columns = [column[1] for column in cursor.fetchall()]
         return column_name in columns
 
+    def table_exists(self, table_name):
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,))
+        return cursor.fetchone() is not None
+
     def add_task(self, task):
+        self.roll_overdue()
         cursor = self.conn.cursor()
         cursor.execute('''
             INSERT INTO tasks (title, description, icon_path, link, reminder_time, priority, category, status, due_date, tags)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (task.title, task.description, task.icon_path, task.link, task.reminder_time, task.priority, task.category, task.status, task.due_date, ','.join(task.tags)))
+        task_id = cursor.lastrowid
+        smart_views.set_task_tags(cursor, task_id, task.tags)
+        rollups.bump_rollup(cursor, date.today().isoformat(), task.category, task.priority, "created", 1)
+        rollups.record_status_change(cursor, task_id, None, task.status, task.category, task.priority)
+        rollups.count_rolled_overdue(cursor, task.due_date, task.status, task.category, task.priority, 1)
         self.conn.commit()
-        return cursor.lastrowid
+        return task_id
 
     def update_task(self, task):
+        # Roll any day that ended before this change lands on the task
+        self.roll_overdue()
         cursor = self.conn.cursor()
+        cursor.execute('SELECT status, due_date, category, priority FROM tasks WHERE id = ?', (task.id,))
+        row = cursor.fetchone()
+        if row and row[0] != task.status:
+            rollups.record_status_change(cursor, task.id, row[0], task.status, task.category, task.priority)
+        if row and (row[1] or "")[:10] != (task.due_date or "")[:10]:
+            # Move the overdue count with the task, like a reopen moves a completion
+            rollups.count_rolled_overdue(cursor, row[1], row[0], row[2], row[3], -1)
+            rollups.count_rolled_overdue(cursor, task.due_date, task.status, task.category, task.priority, 1)
         cursor.execute('''
             UPDATE tasks
             SET title = ?, description = ?, icon_path = ?, link = ?, reminder_time = ?, priority = ?, category = ?, status = ?, due_date = ?, tags = ?
             WHERE id = ?
         ''', (task.title, task.description, task.icon_path, task.link, task.reminder_time, task.priority, task.category, task.status, task.due_date, ','.join(task.tags), task.id))
+        smart_views.set_task_tags(cursor, task.id, task.tags)
         self.conn.commit()
 
     def get_all_tasks(self):
@@ -98,6 +131,7 @@ class DatabaseManager:
     def delete_task(self, task_id):
         cursor = self.conn.cursor()
         cursor.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
+        cursor.execute('DELETE FROM task_tags WHERE task_id = ?', (task_id,))
         self.conn.commit()
 
     def get_all_categories(self):
@@ -111,6 +145,42 @@ class DatabaseManager:
         all_tags = [tag for row in cursor.fetchall() for tag in row[0].split(',') if row[0]]
         return list(set(all_tags))
     
+    def add_smart_view(self, name, query):
+        smart_views.compile_smart_view(query)
+        cursor = self.conn.cursor()
+        cursor.execute('INSERT INTO smart_views (name, query) VALUES (?, ?)', (name, query))
+        self.conn.commit()
+        return cursor.lastrowid
+
+    def get_all_smart_views(self):
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT id, name, query FROM smart_views ORDER BY name')
+        return cursor.fetchall()
+
+    def delete_smart_view(self, view_id):
+        cursor = self.conn.cursor()
+        cursor.execute('DELETE FROM smart_views WHERE id = ?', (view_id,))
+        self.conn.commit()
+
+    def count_smart_view(self, query):
+        where, params = smart_views.compile_smart_view(query)
+        cursor = self.conn.cursor()
+        cursor.execute(f'SELECT COUNT(*) FROM tasks WHERE {where}', params)
+        return cursor.fetchone()[0]
+
+    def get_smart_view_task_ids(self, query):
+        where, params = smart_views.compile_smart_view(query)
+        cursor = self.conn.cursor()
+        cursor.execute(f'SELECT id FROM tasks WHERE {where}', params)
+        return {row[0] for row in cursor.fetchall()}
+
+    def roll_overdue(self):
+        rollups.roll_overdue(self.conn.cursor())
+        self.conn.commit()
+
+    def get_throughput(self, period="week", limit=12):
+        return rollups.get_throughput(self.conn.cursor(), period, limit)
+
     def close_connection(self):
         if self.conn:
             self.conn.close()
@@ -324,15 +394,69 @@ class TaskDialog(QDialog):
             self.icon_path = file_name
             QMessageBox.information(self, "Icon Selected", "Icon has been selected successfully.")
 
+class SmartViewDialog(QDialog):
+    def __init__(self, parent=None, db_manager=None):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.setWindowTitle("New Smart View")
+        self.setMinimumWidth(500)
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QFormLayout(self)
+        layout.setSpacing(10)
+
+        self.name_input = QLineEdit()
+        layout.addRow(QLabel("Name:"), self.name_input)
+
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("priority:high tag:work status:!completed due:<7d category:ops")
+        layout.addRow(QLabel("Query:"), self.query_input)
+
+        self.error_label = QLabel()
+        self.error_label.setStyleSheet("color: #D32F2F;")
+        self.error_label.setWordWrap(True)
+        self.error_label.hide()
+        layout.addRow("", self.error_label)
+
+        save_button = ModernButton("Save")
+        save_button.clicked.connect(self.accept)
+        layout.addRow("", save_button)
+
+    def accept(self):
+        # Stay open on errors so the user can fix what they typed
+        name = self.name_input.text().strip()
+        if not name:
+            self.show_error("Please give the view a name.")
+            return
+        if self.db_manager and name in [view[1] for view in self.db_manager.get_all_smart_views()]:
+            self.show_error(f"A view named '{name}' already exists.")
+            return
+        try:
+            smart_views.compile_smart_view(self.query_input.text())
+        except ValueError as e:
+            self.show_error(f"Invalid query: {e}")
+            return
+        super().accept()
+
+    def show_error(self, message):
+        self.error_label.setText(message)
+        self.error_label.show()
+
 class TodoApp(QMainWindow):
     def __init__(self, db_manager):
         super().__init__()
         self.setWindowTitle('Advanced Todo List')
         self.setGeometry(100, 100, 1000, 800)
         self.db_manager = db_manager
+        self.stats_period = "Weekly"
+        self.active_view_id = None
+        self.active_view_query = None
+        self.active_view_ids = None
         self.init_ui()
         self.load_tasks()
         self.setup_reminders()
+        self.schedule_day_rollover()
         self.setup_autostart()
         self.is_dark_mode = False
         self.set_light_theme()
@@ -365,11 +489,13 @@ class TodoApp(QMainWindow):
         self.calendar_tab = QWidget()
         self.stats_tab = QWidget()
         self.categories_tab = QWidget()
+        self.smart_views_tab = QWidget()
 
         self.tab_widget.addTab(self.all_tasks_tab, "All Tasks")
         self.tab_widget.addTab(self.calendar_tab, "Calendar")
         self.tab_widget.addTab(self.stats_tab, "Stats")
         self.tab_widget.addTab(self.categories_tab, "Categories")
+        self.tab_widget.addTab(self.smart_views_tab, "Smart Views")
 
         main_layout.addWidget(self.tab_widget)
 
@@ -402,6 +528,25 @@ class TodoApp(QMainWindow):
         categories_layout.addWidget(self.categories_list)
         self.update_categories()
 
+        # Smart Views Tab
+        smart_views_layout = QVBoxLayout(self.smart_views_tab)
+        self.smart_views_list = QListWidget()
+        self.smart_views_list.itemClicked.connect(self.on_smart_view_selected)
+        smart_views_layout.addWidget(self.smart_views_list)
+
+        smart_views_buttons = QHBoxLayout()
+        new_view_button = ModernButton("New View")
+        new_view_button.clicked.connect(self.add_smart_view)
+        smart_views_buttons.addWidget(new_view_button)
+        delete_view_button = ModernButton("Delete View")
+        delete_view_button.clicked.connect(self.delete_smart_view)
+        smart_views_buttons.addWidget(delete_view_button)
+        show_all_button = ModernButton("Show All Tasks")
+        show_all_button.clicked.connect(self.clear_smart_view)
+        smart_views_buttons.addWidget(show_all_button)
+        smart_views_layout.addLayout(smart_views_buttons)
+        self.update_smart_views()
+
         # System tray icon
         self.tray_icon = QSystemTrayIcon(self)
         self.tray_icon.setIcon(QIcon("app_icon.png"))
@@ -437,6 +582,7 @@ class TodoApp(QMainWindow):
                 self.setup_reminder(task)
                 self.update_stats()
                 self.update_categories()
+                self.update_smart_views()
         except Exception as e:
             QMessageBox.critical(self, "Error", f"An error occurred while adding the task: {str(e)}")
 
@@ -525,7 +671,7 @@ class TodoApp(QMainWindow):
                         search_text in widget.description.lower() or
                         search_text in widget.category.lower() or
                         any(search_text in tag.lower() for tag in widget.tags)
-                    )
+                    ) and (self.active_view_ids is None or widget.id in self.active_view_ids)
                     widget.setVisible(should_show)
 
     def delete_task(self, task_id):
@@ -540,6 +686,7 @@ class TodoApp(QMainWindow):
                     break
         self.update_stats()
         self.update_categories()
+        self.update_smart_views()
 
     def edit_task(self, task):
         dialog = TaskDialog(task, self, self.db_manager)
@@ -559,10 +706,12 @@ class TodoApp(QMainWindow):
             self.setup_reminder(task)
             self.update_stats()
             self.update_categories()
+            self.update_smart_views()
 
     def on_task_status_changed(self, task):
         self.db_manager.update_task(task)
         self.update_stats()
+        self.update_smart_views()
 
     def on_date_selected(self):
         selected_date = self.calendar_widget.selectedDate().toString(Qt.DateFormat.ISODate)
@@ -601,12 +750,91 @@ class TodoApp(QMainWindow):
             stats_layout.addWidget(QLabel("Completion Rate:"))
             stats_layout.addWidget(progress_bar)
 
+        # Throughput history, read straight from the daily rollups
+        self.db_manager.roll_overdue()
+        period_combo = QComboBox()
+        period_combo.addItems(["Weekly", "Monthly"])
+        period_combo.setCurrentText(self.stats_period)
+        period_combo.currentTextChanged.connect(self.on_stats_period_changed)
+        stats_layout.addWidget(QLabel("Throughput:"))
+        stats_layout.addWidget(period_combo)
+
+        throughput = self.db_manager.get_throughput("month" if self.stats_period == "Monthly" else "week")
+        chart = QWidget()
+        chart_layout = QGridLayout(chart)
+        peak = max((row[2] for row in throughput), default=0)
+        for row, (bucket, created, completed, overdue) in enumerate(throughput):
+            bar = QProgressBar()
+            bar.setRange(0, max(peak, 1))
+            bar.setValue(completed)
+            bar.setFormat("%v completed")
+            chart_layout.addWidget(QLabel(bucket), row, 0)
+            chart_layout.addWidget(bar, row, 1)
+            chart_layout.addWidget(QLabel(f"{created} created, {overdue} overdue"), row, 2)
+        stats_layout.addWidget(chart)
+        stats_layout.addStretch()
+
+    def schedule_day_rollover(self):
+        now = QDateTime.currentDateTime()
+        next_day = QDateTime(now.date().addDays(1), QTime(0, 0, 1))
+        QTimer.singleShot(now.msecsTo(next_day), self.on_day_rollover)
+
+    def on_day_rollover(self):
+        # update_stats rolls the day that just ended before charting it
+        self.update_stats()
+        self.schedule_day_rollover()
+
+    def on_stats_period_changed(self, period):
+        self.stats_period = period
+        self.update_stats()
+
     def update_categories(self):
         self.categories_list.clear()
         categories = self.db_manager.get_all_categories()
         for category in categories:
             self.categories_list.addItem(category)
 
+    def update_smart_views(self):
+        self.smart_views_list.clear()
+        for view_id, name, query in self.db_manager.get_all_smart_views():
+            item = QListWidgetItem(f"{name} ({self.db_manager.count_smart_view(query)})")
+            item.setData(Qt.ItemDataRole.UserRole, (view_id, query))
+            self.smart_views_list.addItem(item)
+
+        # Keep the active view live as tasks change
+        if self.active_view_query is not None:
+            self.active_view_ids = self.db_manager.get_smart_view_task_ids(self.active_view_query)
+            self.filter_tasks()
+
+    def add_smart_view(self):
+        dialog = SmartViewDialog(self, self.db_manager)
+        if dialog.exec() == QDialog.DialogCode.Accepted:
+            self.db_manager.add_smart_view(dialog.name_input.text().strip(), dialog.query_input.text())
+            self.update_smart_views()
+
+    def delete_smart_view(self):
+        item = self.smart_views_list.currentItem()
+        if item:
+            view_id, _ = item.data(Qt.ItemDataRole.UserRole)
+            self.db_manager.delete_smart_view(view_id)
+            if view_id == self.active_view_id:
+                self.clear_smart_view()
+            self.update_smart_views()
+
+    def on_smart_view_selected(self, item):
+        view_id, query = item.data(Qt.ItemDataRole.UserRole)
+        self.active_view_id = view_id
+        self.active_view_query = query
+        self.active_view_ids = self.db_manager.get_smart_view_task_ids(query)
+        self.filter_tasks()
+        self.tab_widget.setCurrentWidget(self.all_tasks_tab)
+
+    def clear_smart_view(self):
+        self.active_view_id = None
+        self.active_view_query = None
+        self.active_view_ids = None
+        self.filter_tasks()
+
     def closeEvent(self, event):
         reply = QMessageBox.question(self, 'Exit', 'Are you sure you want to exit?',
                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No)
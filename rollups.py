@@ -0,0 +1,117 @@
+from datetime import datetime, date, timedelta
+
+def create_rollup_tables(cursor):
+    # Status transitions and per-day rollups feeding the Stats tab
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS task_status_history (
+            id INTEGER PRIMARY KEY,
+            task_id INTEGER,
+            old_status TEXT,
+            new_status TEXT,
+            category TEXT,
+            priority INTEGER,
+            changed_at TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_rollups (
+            day TEXT,
+            category TEXT,
+            priority INTEGER,
+            created INTEGER DEFAULT 0,
+            completed INTEGER DEFAULT 0,
+            overdue INTEGER DEFAULT 0,
+            PRIMARY KEY (day, category, priority)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS rollup_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_task ON task_status_history (task_id, new_status)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_due_status ON tasks (due_date, status)')
+
+def bump_rollup(cursor, day, category, priority, column, delta):
+    # column is always one of the fixed counter names, never user input
+    key = (day, category or "", int(priority or 0))
+    cursor.execute('INSERT OR IGNORE INTO daily_rollups (day, category, priority) VALUES (?, ?, ?)', key)
+    cursor.execute(f'UPDATE daily_rollups SET {column} = {column} + ? WHERE day = ? AND category = ? AND priority = ?',
+                   (delta,) + key)
+
+def record_status_change(cursor, task_id, old_status, new_status, category, priority, now=None):
+    changed_at = (now or datetime.now()).isoformat(timespec="seconds")
+    if new_status == "Completed":
+        bump_rollup(cursor, changed_at[:10], category, priority, "completed", 1)
+    elif old_status == "Completed":
+        # Reopened: take the completion back out of the day it was counted on
+        cursor.execute('''
+            SELECT changed_at, category, priority FROM task_status_history
+            WHERE task_id = ? AND new_status = 'Completed'
+            ORDER BY id DESC LIMIT 1
+        ''', (task_id,))
+        row = cursor.fetchone()
+        if row:
+            bump_rollup(cursor, row[0][:10], row[1], row[2], "completed", -1)
+    cursor.execute('''
+        INSERT INTO task_status_history (task_id, old_status, new_status, category, priority, changed_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (task_id, old_status, new_status, category or "", int(priority or 0), changed_at))
+
+def count_rolled_overdue(cursor, due_date, status, category, priority, delta):
+    # The roll never revisits a day, so an open task landing on or leaving
+    # one is counted here. Days before tracking started are never counted.
+    day = (due_date or "")[:10]
+    cursor.execute("SELECT key, value FROM rollup_state WHERE key IN ('rollups_started', 'overdue_through')")
+    state = dict(cursor.fetchall())
+    if (day and status != "Completed" and "rollups_started" in state
+            and state["rollups_started"] <= day < state["overdue_through"]):
+        bump_rollup(cursor, day, category, priority, "overdue", delta)
+
+def roll_overdue(cursor, today=None):
+    # Days are rolled once, after they end: anything due that day and still
+    # not completed when the roll runs counts as overdue for that day.
+    today = (today or date.today()).isoformat()
+    cursor.execute("SELECT value FROM rollup_state WHERE key = 'overdue_through'")
+    row = cursor.fetchone()
+    if not row:
+        # Created and completed cannot be reconstructed for the past, so
+        # overdue starts counting from the same day as the other counters
+        cursor.executemany("INSERT INTO rollup_state (key, value) VALUES (?, ?)",
+                           [("rollups_started", today), ("overdue_through", today)])
+        return
+    start = row[0]
+    if start >= today:
+        return
+    cursor.execute('''
+        SELECT substr(due_date, 1, 10), IFNULL(category, ''), IFNULL(priority, 0), COUNT(*)
+        FROM tasks
+        WHERE due_date >= ? AND due_date < ? AND IFNULL(status, '') != 'Completed'
+        GROUP BY 1, 2, 3
+    ''', (start, today))
+    for day, category, priority, count in cursor.fetchall():
+        bump_rollup(cursor, day, category, priority, "overdue", count)
+    cursor.execute("INSERT OR REPLACE INTO rollup_state (key, value) VALUES ('overdue_through', ?)", (today,))
+
+def get_throughput(cursor, period="week", limit=12, today=None):
+    today = today or date.today()
+    if period == "month":
+        first = today.year * 12 + today.month - limit
+        buckets = [f"{month // 12:04d}-{month % 12 + 1:02d}" for month in range(first, first + limit)]
+        bucket = "substr(day, 1, 7)"
+        start = buckets[0] + "-01"
+    else:
+        monday = today - timedelta(days=today.weekday(), weeks=limit - 1)
+        buckets = [(monday + timedelta(weeks=week)).isoformat() for week in range(limit)]
+        bucket = "date(day, '-' || ((strftime('%w', day) + 6) % 7) || ' days')"
+        start = buckets[0]
+    cursor.execute(f'''
+        SELECT {bucket} AS bucket, SUM(created), SUM(completed), SUM(overdue)
+        FROM daily_rollups
+        WHERE day >= ?
+        GROUP BY bucket
+    ''', (start,))
+    sums = {row[0]: row[1:] for row in cursor.fetchall()}
+    # Quiet periods have no rollup rows but still belong on the chart
+    return [(key,) + tuple(sums.get(key, (0, 0, 0))) for key in buckets]
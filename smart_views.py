@@ -0,0 +1,126 @@
+import re
+from datetime import datetime, date, timedelta
+
+SMART_VIEW_STATUSES = {"notstarted": "Not Started", "inprogress": "In Progress", "completed": "Completed"}
+SMART_VIEW_PRIORITIES = {"low": 0, "medium": 1, "high": 2}
+# Columns added by ALTER TABLE can be NULL on older databases
+SMART_VIEW_NULLABLE_COLUMNS = {"priority": "priority", "status": "status", "category": "category", "due": "due_date"}
+
+def compile_smart_view(query, now=None):
+    """Compile a smart view query into a parameterized WHERE clause over tasks.
+
+    Terms are space separated ``key:value`` pairs, e.g.
+    ``priority:high tag:work status:!completed due:<7d category:ops``.
+    A leading ``!`` negates a value; priority and due also accept
+    ``<``, ``<=``, ``>`` and ``>=``. Bare words match title or description.
+    Raises ValueError for anything it does not understand.
+    """
+    now = now or datetime.now()
+    clauses, params = [], []
+    for term in query.split():
+        key, sep, value = term.partition(":")
+        if not sep:
+            pattern = "%" + re.sub(r"([\\%_])", r"\\\1", term) + "%"
+            clauses.append("(title LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\')")
+            params += [pattern, pattern]
+            continue
+        key = key.lower()
+        negate = value.startswith("!")
+        if negate:
+            value = value[1:]
+        op = "="
+        for candidate in ("<=", ">=", "<", ">"):
+            if value.startswith(candidate):
+                op, value = candidate, value[len(candidate):]
+                break
+        if not value:
+            raise ValueError(f"Missing value in '{term}'")
+        if op != "=" and key not in ("priority", "due"):
+            raise ValueError(f"'{key}' does not support '{op}'")
+
+        if key == "priority":
+            if value.lower() not in SMART_VIEW_PRIORITIES:
+                raise ValueError(f"Unknown priority '{value}' (use low, medium or high)")
+            clause, args = f"priority {op} ?", [SMART_VIEW_PRIORITIES[value.lower()]]
+        elif key == "status":
+            status = SMART_VIEW_STATUSES.get(re.sub(r"[^a-z]", "", value.lower()))
+            if status is None:
+                raise ValueError(f"Unknown status '{value}' (use not-started, in-progress or completed)")
+            clause, args = "status = ?", [status]
+        elif key == "category":
+            clause, args = "category = ? COLLATE NOCASE", [value]
+        elif key == "tag":
+            clause, args = "id IN (SELECT task_id FROM task_tags WHERE tag = ?)", [value.lower()]
+        elif key == "due":
+            clause, args = compile_due_term(op, value.lower(), now)
+        else:
+            raise ValueError(f"Unknown field '{key}'")
+
+        if negate:
+            column = SMART_VIEW_NULLABLE_COLUMNS.get(key)
+            # NOT (NULL = ?) is NULL, so rows without a value would drop out
+            clause = f"({column} IS NULL OR NOT ({clause}))" if column else f"NOT ({clause})"
+        clauses.append(clause)
+        params += args
+    return " AND ".join(clauses) or "1", params
+
+def compile_due_term(op, value, now):
+    if value == "overdue":
+        if op != "=":
+            raise ValueError("'due:overdue' does not support comparisons")
+        return "due_date > '' AND due_date < ? AND IFNULL(status, '') != 'Completed'", [now.isoformat(timespec="seconds")]
+
+    # Every form resolves to a half-open [start, end) range of due dates
+    match = re.fullmatch(r"(\d+)([dw])", value)
+    if value == "today":
+        start = datetime.combine(now.date(), datetime.min.time())
+        end = start + timedelta(days=1)
+    elif match:
+        amount = int(match.group(1))
+        end = now + (timedelta(days=amount) if match.group(2) == "d" else timedelta(weeks=amount))
+        # Plain "due:7d" means due within the next seven days
+        start = now if op == "=" else end
+    else:
+        try:
+            start = datetime.combine(date.fromisoformat(value), datetime.min.time())
+        except ValueError:
+            raise ValueError(f"Unknown due date '{value}' (use today, overdue, 7d, 2w or YYYY-MM-DD)")
+        end = start + timedelta(days=1)
+
+    start, end = start.isoformat(timespec="seconds"), end.isoformat(timespec="seconds")
+    if op == "<":
+        return "due_date > '' AND due_date < ?", [start]
+    if op == "<=":
+        return "due_date > '' AND due_date < ?", [end]
+    if op == ">":
+        return "due_date >= ?", [end]
+    if op == ">=":
+        return "due_date >= ?", [start]
+    return "due_date >= ? AND due_date < ?", [start, end]
+
+def create_smart_view_tables(cursor):
+    # Smart views compile to SQL against these indexes
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS task_tags (
+            task_id INTEGER,
+            tag TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS smart_views (
+            id INTEGER PRIMARY KEY,
+            name TEXT UNIQUE,
+            query TEXT
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_task_tags_tag ON task_tags (tag, task_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_task_tags_task ON task_tags (task_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks (priority)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_category ON tasks (category COLLATE NOCASE)')
+
+def set_task_tags(cursor, task_id, tags):
+    cursor.execute('DELETE FROM task_tags WHERE task_id = ?', (task_id,))
+    unique_tags = {tag.strip().lower() for tag in tags if tag.strip()}
+    cursor.executemany('INSERT INTO task_tags (task_id, tag) VALUES (?, ?)',
+                       [(task_id, tag) for tag in unique_tags])
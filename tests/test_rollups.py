@@ -0,0 +1,113 @@
+import sqlite3
+from datetime import date, datetime
+
+import pytest
+
+import rollups
+
+
+@pytest.fixture
+def cursor():
+    conn = sqlite3.connect(":memory:")
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE tasks (
+            id INTEGER PRIMARY KEY,
+            title TEXT,
+            priority INTEGER,
+            category TEXT,
+            status TEXT,
+            due_date TEXT
+        )
+    ''')
+    rollups.create_rollup_tables(cursor)
+    yield cursor
+    conn.close()
+
+
+def rollup_rows(cursor, column):
+    cursor.execute(f'SELECT day, {column} FROM daily_rollups WHERE {column} != 0 ORDER BY day')
+    return cursor.fetchall()
+
+
+def add_task(cursor, due_date, status="Not Started", category="ops", priority=1):
+    cursor.execute('INSERT INTO tasks (title, priority, category, status, due_date) VALUES (?, ?, ?, ?, ?)',
+                   ("task", priority, category, status, due_date))
+    return cursor.lastrowid
+
+
+def test_complete_then_reopen_same_day(cursor):
+    now = datetime(2026, 10, 19, 9, 0)
+    rollups.record_status_change(cursor, 1, None, "Not Started", "ops", 1, now=now)
+    rollups.record_status_change(cursor, 1, "Not Started", "Completed", "ops", 1, now=now)
+    assert rollup_rows(cursor, "completed") == [("2026-10-19", 1)]
+    rollups.record_status_change(cursor, 1, "Completed", "In Progress", "ops", 1, now=now)
+    assert rollup_rows(cursor, "completed") == []
+
+
+def test_reopen_on_later_day_removes_original_completion(cursor):
+    rollups.record_status_change(cursor, 1, "Not Started", "Completed", "ops", 2, now=datetime(2026, 10, 12, 9, 0))
+    rollups.record_status_change(cursor, 1, "Completed", "Not Started", "dev", 0, now=datetime(2026, 10, 15, 9, 0))
+    cursor.execute('SELECT day, category, priority, completed FROM daily_rollups')
+    assert cursor.fetchall() == [("2026-10-12", "ops", 2, 0)]
+
+
+def test_first_roll_does_not_backfill(cursor):
+    add_task(cursor, "2026-09-01T09:00:00")
+    rollups.roll_overdue(cursor, today=date(2026, 10, 19))
+    assert rollup_rows(cursor, "overdue") == []
+    rollups.count_rolled_overdue(cursor, "2026-09-01T09:00:00", "Not Started", "ops", 1, 1)
+    assert rollup_rows(cursor, "overdue") == []
+
+
+def test_roll_spanning_several_days(cursor):
+    rollups.roll_overdue(cursor, today=date(2026, 10, 10))
+    add_task(cursor, "2026-10-10T09:00:00")
+    add_task(cursor, "2026-10-11T09:00:00")
+    add_task(cursor, "2026-10-11T18:00:00", category="dev")
+    add_task(cursor, "2026-10-12T09:00:00", status="Completed")
+    add_task(cursor, "2026-10-13T09:00:00")
+
+    rollups.roll_overdue(cursor, today=date(2026, 10, 13))
+    assert rollup_rows(cursor, "overdue") == [("2026-10-10", 1), ("2026-10-11", 1), ("2026-10-11", 1)]
+
+    # Rolling again the same day, or a later day, never recounts a rolled day
+    rollups.roll_overdue(cursor, today=date(2026, 10, 13))
+    rollups.roll_overdue(cursor, today=date(2026, 10, 14))
+    assert [day for day, _ in rollup_rows(cursor, "overdue")] == ["2026-10-10", "2026-10-11", "2026-10-11", "2026-10-13"]
+
+
+def test_due_date_move_between_rolled_days_moves_the_count(cursor):
+    rollups.roll_overdue(cursor, today=date(2026, 10, 10))
+    add_task(cursor, "2026-10-11T09:00:00")
+    rollups.roll_overdue(cursor, today=date(2026, 10, 19))
+    rollups.count_rolled_overdue(cursor, "2026-10-11T09:00:00", "Not Started", "ops", 1, -1)
+    rollups.count_rolled_overdue(cursor, "2026-10-15T09:00:00", "Not Started", "ops", 1, 1)
+    assert rollup_rows(cursor, "overdue") == [("2026-10-15", 1)]
+
+
+def test_weekly_throughput_fills_quiet_weeks(cursor):
+    # Sunday 2026-10-18 belongs to the week starting Monday 2026-10-12
+    rollups.bump_rollup(cursor, "2026-10-18", "ops", 1, "completed", 2)
+    rollups.bump_rollup(cursor, "2026-10-05", "ops", 1, "created", 1)
+    rollups.bump_rollup(cursor, "2026-10-06", "dev", 0, "overdue", 3)
+    throughput = rollups.get_throughput(cursor, "week", 4, today=date(2026, 10, 21))
+    assert throughput == [
+        ("2026-09-28", 0, 0, 0),
+        ("2026-10-05", 1, 0, 3),
+        ("2026-10-12", 0, 2, 0),
+        ("2026-10-19", 0, 0, 0),
+    ]
+
+
+def test_monthly_throughput_across_year_boundary(cursor):
+    rollups.bump_rollup(cursor, "2025-12-31", "ops", 1, "completed", 1)
+    rollups.bump_rollup(cursor, "2026-01-01", "ops", 1, "completed", 2)
+    rollups.bump_rollup(cursor, "2025-10-31", "ops", 1, "completed", 5)
+    throughput = rollups.get_throughput(cursor, "month", 4, today=date(2026, 2, 10))
+    assert throughput == [
+        ("2025-11", 0, 0, 0),
+        ("2025-12", 0, 1, 0),
+        ("2026-01", 0, 2, 0),
+        ("2026-02", 0, 0, 0),
+    ]
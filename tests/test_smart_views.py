@@ -0,0 +1,190 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+import rollups
+from smart_views import compile_smart_view, create_smart_view_tables, set_task_tags
+
+NOW = datetime(2026, 10, 19, 12, 30, 0)
+
+
+def compile_at_now(query):
+    return compile_smart_view(query, now=NOW)
+
+
+def test_empty_query_matches_everything():
+    assert compile_at_now("") == ("1", [])
+
+
+def test_terms_are_joined_with_and():
+    where, params = compile_at_now("priority:high category:ops")
+    assert where == "priority = ? AND category = ? COLLATE NOCASE"
+    assert params == [2, "ops"]
+
+
+def test_bare_word_escapes_like_wildcards():
+    where, params = compile_at_now("100%_a\\b")
+    assert where == "(title LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\')"
+    assert params == ["%100\\%\\_a\\\\b%"] * 2
+
+
+@pytest.mark.parametrize("op", ["<", "<=", ">", ">="])
+def test_priority_comparisons(op):
+    assert compile_at_now(f"priority:{op}Medium") == (f"priority {op} ?", [1])
+
+
+@pytest.mark.parametrize("value, status", [
+    ("completed", "Completed"),
+    ("in-progress", "In Progress"),
+    ("NotStarted", "Not Started"),
+    ("not_started", "Not Started"),
+])
+def test_status_spellings(value, status):
+    assert compile_at_now(f"status:{value}") == ("status = ?", [status])
+
+
+def test_tag_uses_task_tags_lowercased():
+    assert compile_at_now("tag:Work") == ("id IN (SELECT task_id FROM task_tags WHERE tag = ?)", ["work"])
+
+
+def test_negation_keeps_null_rows():
+    assert compile_at_now("status:!completed") == ("(status IS NULL OR NOT (status = ?))", ["Completed"])
+    assert compile_at_now("category:!ops") == ("(category IS NULL OR NOT (category = ? COLLATE NOCASE))", ["ops"])
+
+
+def test_negated_tag_has_no_null_guard():
+    where, _ = compile_at_now("tag:!work")
+    assert where == "NOT (id IN (SELECT task_id FROM task_tags WHERE tag = ?))"
+
+
+def test_due_today():
+    assert compile_at_now("due:today") == ("due_date >= ? AND due_date < ?", ["2026-10-19T00:00:00", "2026-10-20T00:00:00"])
+
+
+def test_due_within_days_and_weeks():
+    assert compile_at_now("due:7d") == ("due_date >= ? AND due_date < ?", ["2026-10-19T12:30:00", "2026-10-26T12:30:00"])
+    assert compile_at_now("due:2w") == ("due_date >= ? AND due_date < ?", ["2026-10-19T12:30:00", "2026-11-02T12:30:00"])
+
+
+@pytest.mark.parametrize("op, where, bound", [
+    ("<", "due_date > '' AND due_date < ?", "2026-10-26T12:30:00"),
+    ("<=", "due_date > '' AND due_date < ?", "2026-10-26T12:30:00"),
+    (">", "due_date >= ?", "2026-10-26T12:30:00"),
+    (">=", "due_date >= ?", "2026-10-26T12:30:00"),
+])
+def test_due_relative_comparisons(op, where, bound):
+    assert compile_at_now(f"due:{op}7d") == (where, [bound])
+
+
+@pytest.mark.parametrize("op, where, params", [
+    ("", "due_date >= ? AND due_date < ?", ["2026-11-01T00:00:00", "2026-11-02T00:00:00"]),
+    ("<", "due_date > '' AND due_date < ?", ["2026-11-01T00:00:00"]),
+    ("<=", "due_date > '' AND due_date < ?", ["2026-11-02T00:00:00"]),
+    (">", "due_date >= ?", ["2026-11-02T00:00:00"]),
+    (">=", "due_date >= ?", ["2026-11-01T00:00:00"]),
+])
+def test_due_iso_date(op, where, params):
+    assert compile_at_now(f"due:{op}2026-11-01") == (where, params)
+
+
+def test_due_overdue():
+    where, params = compile_at_now("due:overdue")
+    assert where == "due_date > '' AND due_date < ? AND IFNULL(status, '') != 'Completed'"
+    assert params == ["2026-10-19T12:30:00"]
+
+
+def test_negated_due_keeps_null_rows():
+    where, _ = compile_at_now("due:!overdue")
+    assert where.startswith("(due_date IS NULL OR NOT (")
+
+
+@pytest.mark.parametrize("query, message", [
+    ("tag:", "Missing value"),
+    ("category:<ops", "does not support"),
+    ("priority:urgent", "Unknown priority"),
+    ("status:done", "Unknown status"),
+    ("due:<overdue", "does not support comparisons"),
+    ("due:soon", "Unknown due date"),
+    ("due:2026-13-01", "Unknown due date"),
+    ("owner:me", "Unknown field"),
+])
+def test_errors(query, message):
+    with pytest.raises(ValueError, match=message):
+        compile_at_now(query)
+
+
+@pytest.fixture
+def cursor():
+    conn = sqlite3.connect(":memory:")
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE tasks (
+            id INTEGER PRIMARY KEY,
+            title TEXT,
+            description TEXT,
+            priority INTEGER,
+            category TEXT,
+            status TEXT,
+            due_date TEXT
+        )
+    ''')
+    rollups.create_rollup_tables(cursor)
+    create_smart_view_tables(cursor)
+    tasks = [
+        (1, "100% done", "", 2, "ops", "Not Started", "2026-10-20T09:00:00", ["Work", " urgent"]),
+        (2, "1000 done", "", 0, "Ops", "Completed", "2026-10-10T09:00:00", ["home"]),
+        (3, "a_b", "", 1, "dev", "In Progress", "2026-11-01T09:00:00", ["work"]),
+        # A row from an older database, where ALTER TABLE left the columns NULL
+        (4, "axb", None, None, None, None, None, []),
+        (5, "cd", "c\\d", 1, "dev", "Not Started", "2026-10-01T09:00:00", []),
+    ]
+    for task_id, title, description, priority, category, status, due_date, tags in tasks:
+        cursor.execute('INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?)',
+                       (task_id, title, description, priority, category, status, due_date))
+        set_task_tags(cursor, task_id, tags)
+    yield cursor
+    conn.close()
+
+
+def matching_ids(cursor, query):
+    where, params = compile_at_now(query)
+    cursor.execute(f'SELECT id FROM tasks WHERE {where}', params)
+    return {row[0] for row in cursor.fetchall()}
+
+
+@pytest.mark.parametrize("query, ids", [
+    ("tag:WORK", {1, 3}),
+    ("tag:urgent", {1}),
+    ("tag:!work", {2, 4, 5}),
+    ("category:ops", {1, 2}),
+    ("category:!ops", {3, 4, 5}),
+    ("status:!completed", {1, 3, 4, 5}),
+    ("priority:!high", {2, 3, 4, 5}),
+    ("priority:>=medium", {1, 3, 5}),
+    ("due:<7d", {1, 2, 5}),
+    ("due:!<7d", {3, 4}),
+    ("due:today", set()),
+    ("due:2026-10-20", {1}),
+    ("due:overdue", {5}),
+    ("due:!overdue", {1, 2, 3, 4}),
+    ("100%", {1}),
+    ("a_b", {3}),
+    ("c\\d", {5}),
+    ("priority:high tag:work status:!completed due:<7d category:ops", {1}),
+])
+def test_query_results(cursor, query, ids):
+    assert matching_ids(cursor, query) == ids
+
+
+@pytest.mark.parametrize("query, index", [
+    ("tag:work", "idx_task_tags_tag"),
+    ("category:ops", "idx_tasks_category"),
+    ("due:<7d", "idx_tasks_due_status"),
+    ("due:overdue", "idx_tasks_due_status"),
+])
+def test_query_uses_index(cursor, query, index):
+    where, params = compile_at_now(query)
+    cursor.execute(f'EXPLAIN QUERY PLAN SELECT id FROM tasks WHERE {where}', params)
+    plan = " ".join(row[-1] for row in cursor.fetchall())
+    assert index in plan